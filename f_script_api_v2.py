@@ -1,10 +1,15 @@
-import pdfplumber
-import json
-from typing import Dict, List, Any, Optional
+import fitz
+import orjson
+from typing import Dict, List, Any, Optional, Union, IO
+import io
 import re
+import hashlib
+import sqlite3
 import zipfile
 import os
 import random
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from groq import Groq
 from pathlib import Path
 from dotenv import load_dotenv
@@ -12,6 +17,11 @@ from time import sleep
 
 load_dotenv()
 
+_FITZ_LOCK = threading.Lock()
+
+_KEY_RE = re.compile(r'^gsk_[A-Za-z0-9]{32,}$')
+_WHITESPACE_RE = re.compile(r'\s+')
+
 class GroqAPIError(Exception):
     """Custom exception for Groq API errors"""
     pass
@@ -26,10 +36,19 @@ class MultiGroqClient:
         if not self.api_keys:
             raise ValueError("No valid API keys found")
             
-        self.current_client = None
+        self._local = threading.local()  # Each worker thread holds its own Groq client
+        self._lock = threading.Lock()  # Guards the shared key bookkeeping below
         self.used_keys = set()
         self.invalid_keys = set()  # Track permanently invalid keys
-        self._initialize_client()
+
+    @property
+    def current_client(self) -> Optional[Groq]:
+        """Groq client bound to the calling thread"""
+        return getattr(self._local, "client", None)
+
+    @current_client.setter
+    def current_client(self, client: Optional[Groq]) -> None:
+        self._local.client = client
         
     def _is_valid_key_format(self, key: str) -> bool:
         """Basic validation of API key format"""
@@ -37,54 +56,39 @@ class MultiGroqClient:
             return False
         key = key.strip()
         # Basic format check for Groq API keys
-        return bool(re.match(r'^gsk_[A-Za-z0-9]{32,}$', key))
-
-    def _validate_api_key(self, key: str) -> bool:
-        """Test if an API key is valid by making a minimal API call"""
-        try:
-            test_client = Groq(api_key=key)
-            # Make a minimal API call to verify the key
-            test_client.chat.completions.create(
-                model="llama3-8b-8192",
-                messages=[{"role": "user", "content": "test"}],
-                max_tokens=1
-            )
-            return True
-        except Exception as e:
-            if "invalid_api_key" in str(e).lower() or "401" in str(e):
-                return False
-            # If it's a different error (e.g., rate limit), assume key might be valid
-            return True
+        return bool(_KEY_RE.match(key))
 
     def _initialize_client(self) -> Optional[str]:
         """Initialize or reinitialize the Groq client with a random unused and valid API key"""
-        available_keys = [key for key in self.api_keys 
-                         if key not in self.used_keys and key not in self.invalid_keys]
-        
-        if not available_keys:
-            if len(self.invalid_keys) == len(self.api_keys):
-                raise GroqAPIError("All API keys are invalid")
-            # Reset used keys if all valid keys have been tried
-            self.used_keys.clear()
-            available_keys = [key for key in self.api_keys if key not in self.invalid_keys]
-
-        selected_key = random.choice(available_keys)
-        
-        # Validate the selected key
-        if not self._validate_api_key(selected_key):
-            print(f"API key validation failed for key ending in ...{selected_key[-4:]}")
-            self.invalid_keys.add(selected_key)
-            return self._initialize_client()  # Recursively try another key
-            
-        self.current_client = Groq(api_key=selected_key)
-        self.used_keys.add(selected_key)
-        print(f"Successfully initialized client with key ending in ...{selected_key[-4:]}")
-        return selected_key
+        with self._lock:
+            candidates = [key for key in self.api_keys
+                          if key not in self.invalid_keys and key not in self.used_keys]
+
+            if not candidates:
+                if len(self.invalid_keys) == len(self.api_keys):
+                    raise GroqAPIError("All API keys are invalid")
+                # Reset used keys if all valid keys have been tried
+                self.used_keys.clear()
+                candidates = [key for key in self.api_keys if key not in self.invalid_keys]
+
+            # Keys are validated lazily: a bad key fails its first real request and
+            # create_chat_completion marks it invalid before failing over
+            selected_key = random.choice(candidates)
+
+            self.current_client = Groq(api_key=selected_key)
+            self.used_keys.add(selected_key)
+            print(f"Successfully initialized client with key ending in ...{selected_key[-4:]}")
+            return selected_key
 
     def create_chat_completion(self, *args, **kwargs) -> Any:
         """Wrapper for chat completion with automatic failover and retry logic"""
         max_retries = len(self.api_keys)
         retries = 0
+
+        # Each calling thread picks its own key on first use, spreading concurrent
+        # calls across rate limits
+        if self.current_client is None:
+            self._initialize_client()
         
         while retries < max_retries:
             try:
@@ -93,23 +97,44 @@ class MultiGroqClient:
                 error_str = str(e).lower()
                 retries += 1
                 
+                delay = 1.0
                 if "invalid_api_key" in error_str or "401" in error_str:
                     # Mark the current key as invalid
                     current_key = self.current_client.api_key
-                    self.invalid_keys.add(current_key)
+                    with self._lock:
+                        self.invalid_keys.add(current_key)
                     print(f"Invalid API key detected (ending in ...{current_key[-4:]})")
+                    # Switching keys is all that's needed, no point waiting
+                    delay = 0.0
+                elif "429" in error_str or "rate_limit" in error_str:
+                    # Honor the server's hint, else back off exponentially with jitter; either way
+                    # cap the wait so a quota reset hours away can't stall a worker
+                    delay = self._retry_after(e)
+                    if delay is None:
+                        delay = 2 ** retries + random.random()
+                    delay = min(delay, 30)
                 
                 if retries < max_retries:
                     print(f"API call failed: {str(e)}. Attempt {retries} of {max_retries}")
                     try:
                         self._initialize_client()
-                        # Add a small delay before retry
-                        sleep(1)
+                        if delay:
+                            sleep(delay)
                     except GroqAPIError as ge:
                         raise ge
                 else:
                     raise GroqAPIError("All API keys failed or are invalid") from e
 
+    @staticmethod
+    def _retry_after(error: Exception) -> Optional[float]:
+        """Seconds to wait according to the error response's Retry-After header, if any"""
+        response = getattr(error, "response", None)
+        value = getattr(response, "headers", {}).get("retry-after")
+        try:
+            return float(value) if value is not None else None
+        except ValueError:
+            return None
+
 class ResumeProcessor:
     def __init__(self, zip_path: str, output_folder: str, groq_api_keys: List[str]):
         self.zip_path = zip_path
@@ -122,118 +147,78 @@ class ResumeProcessor:
         # Create output folder if it doesn't exist
         os.makedirs(output_folder, exist_ok=True)
 
+        # On-disk cache of LLM responses so repeated resumes skip the API call
+        self.cache = sqlite3.connect('llm_cache.db', check_same_thread=False)
+        self.cache_lock = threading.Lock()
+        self.cache.execute('CREATE TABLE IF NOT EXISTS llm_cache (key TEXT PRIMARY KEY, response TEXT)')
+        self.cache.commit()
+
     def process_all_resumes(self):
         """Process all PDF files in the zip folder"""
         with zipfile.ZipFile(self.zip_path, 'r') as zip_ref:
-            # Extract all PDFs to a temporary folder
-            temp_folder = "temp_pdfs"
-            os.makedirs(temp_folder, exist_ok=True)
+            # Skip directories, empty entries and macOS resource-fork "PDFs" up front
+            pdfs = [info.filename for info in zip_ref.infolist()
+                    if info.filename.lower().endswith('.pdf')
+                    and not info.filename.startswith('__MACOSX/')
+                    and not info.is_dir()
+                    and info.file_size > 0]
+            if pdfs:
+                # Work is dominated by PDF parsing and Groq round-trips, so threads overlap well
+                max_workers = min(len(self.client.api_keys) * 4, 16)
+                with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                    futures = {executor.submit(self._process_one, zip_ref, file): file
+                               for file in pdfs}
+                    for done, future in enumerate(as_completed(futures), start=1):
+                        print(f"Finished {done}/{len(pdfs)}: {futures[future]}")
+
+    def _process_one(self, zip_ref: zipfile.ZipFile, file: str) -> None:
+        """Parse and save a single PDF read straight from the zip"""
+        # Process each PDF
+        print(f"Processing: {file}")
+        try:
+            with zip_ref.open(file) as src:
+                data = src.read()
 
-            for file in zip_ref.namelist():
-                if file.lower().endswith('.pdf'):
-                    zip_ref.extract(file, temp_folder)
-                    pdf_path = os.path.join(temp_folder, file)
+            resume_data = self.extract_from_pdf(io.BytesIO(data))
+            llm_processed_data = self.process_with_llm(resume_data)
 
-                    # Process each PDF
-                    print(f"Processing: {file}")
-                    try:
-                        resume_data = self.extract_from_pdf(pdf_path)
-                        llm_processed_data = self.process_with_llm(resume_data)
+            # Save to JSON with original filename
+            output_filename = os.path.splitext(file)[0] + '.json'
+            output_path = os.path.join(self.output_folder, output_filename)
 
-                        # Save to JSON with original filename
-                        output_filename = os.path.splitext(file)[0] + '.json'
-                        output_path = os.path.join(self.output_folder, output_filename)
+            with open(output_path, 'wb') as f:
+                f.write(orjson.dumps(llm_processed_data, option=orjson.OPT_INDENT_2))
 
-                        with open(output_path, 'w', encoding='utf-8') as f:
-                            json.dump(llm_processed_data, f, indent=2, ensure_ascii=False)
+            print(f"Saved: {output_filename}")
 
-                        print(f"Saved: {output_filename}")
+        except Exception as e:
+            print(f"Error processing {file}: {str(e)}")
 
-                    except Exception as e:
-                        print(f"Error processing {file}: {str(e)}")
+    def extract_from_pdf(self, pdf_source: Union[str, IO[bytes]]) -> Dict[str, Any]:
+        """Extract cleaned text from a single PDF path or binary file object"""
+        try:
+            if isinstance(pdf_source, str):
+                open_args = {"filename": pdf_source}
+            else:
+                open_args = {"stream": pdf_source.read(), "filetype": "pdf"}
 
-                    # Clean up the temporary PDF file
-                    os.remove(pdf_path)
+            # MuPDF is not thread-safe, so workers take turns on the (fast) text extraction
+            with _FITZ_LOCK, fitz.open(**open_args) as doc:
+                page_texts = [page.get_text('text') for page in doc]
 
-            # Remove temporary folder
-            os.rmdir(temp_folder)
+            # Only the cleaned raw text is sent to the LLM, so no sectioning or contact parsing here
+            text_parts = []
+            for text in page_texts:
+                for line in text.split('\n'):
+                    clean_line = line.strip()
+                    if clean_line:
+                        text_parts.append(clean_line)
 
-    def extract_from_pdf(self, pdf_path: str) -> Dict[str, Any]:
-        """Extract text and structure from a single PDF"""
-        try:
-            with pdfplumber.open(pdf_path) as pdf:
-                full_text = ""
-                sections = []
-                current_section = {"heading": "", "content": []}
-
-                for page in pdf.pages:
-                    text = page.extract_text()
-                    if text:
-                        lines = text.split('\n')
-
-                        for line in lines:
-                            clean_line = line.strip()
-                            if clean_line:
-                                if self._is_likely_header(clean_line):
-                                    if current_section["heading"] or current_section["content"]:
-                                        sections.append(current_section.copy())
-                                    current_section = {
-                                        "heading": clean_line,
-                                        "content": []
-                                    }
-                                else:
-                                    current_section["content"].append(clean_line)
-                                full_text += clean_line + "\n"
-
-                if current_section["heading"] or current_section["content"]:
-                    sections.append(current_section)
-
-                contact_info = self._extract_contact_info(full_text)
-
-                return {
-                    "raw_text": full_text.strip(),
-                    "contact_info": contact_info,
-                    "sections": sections
-                }
+            return {"raw_text": "\n".join(text_parts)}
 
         except Exception as e:
             raise Exception(f"Error extracting text: {str(e)}")
 
-    def _is_likely_header(self, line: str) -> bool:
-        """Determine if a line is likely a section header"""
-        header_patterns = [
-            r'^[A-Z\s&-]+$',
-            r'^(EDUCATION|EXPERIENCE|SKILLS|PROJECTS|SUMMARY|WORK|CONTACT|ACHIEVEMENTS|CERTIFICATIONS|LANGUAGES)',
-            r'^[A-Z][a-zA-Z\s]+:',
-            r'^[A-Z][a-zA-Z\s]{2,30}$'
-        ]
-        return any(re.match(pattern, line.strip()) for pattern in header_patterns)
-
-    def _extract_contact_info(self, text: str) -> Dict[str, List[str]]:
-        """Extract contact information from text"""
-        contact_info = {
-            "emails": [],
-            "phones": [],
-            "links": [],
-            "location": []
-        }
-
-        first_lines = text.split('\n')[:10]
-        for line in first_lines:
-            emails = re.findall(r'[\w\.-]+@[\w\.-]+\.\w+', line)
-            contact_info["emails"].extend(emails)
-
-            phones = re.findall(r'[\+]?[\d\s-]{10,}', line)
-            contact_info["phones"].extend([p.strip() for p in phones])
-
-            links = re.findall(r'(?:https?://)?(?:www\.)?[\w\.-]+\.\w+/[\w\.-]+', line)
-            contact_info["links"].extend(links)
-
-            locations = re.findall(r'[\w\s]+,\s*[\w\s]+', line)
-            contact_info["location"].extend([loc.strip() for loc in locations])
-
-        return contact_info
-
     def process_with_llm(self, resume_data: Dict[str, Any]) -> Dict[str, Any]:
         """Process extracted resume data with Groq LLM using multiple API keys"""
         system_prompt = {
@@ -241,57 +226,89 @@ class ResumeProcessor:
             "content": """
             You are an expert HR assistant skilled in creating structured reports. Your task is to process the input data and generate a JSON output with essential details. 
             Include the number of years served in each company and role in brackets. If any required column value is missing, leave it blank. 
-            Here's an example of the output:
-            [
-              {
-                "Name": "john doe",
-                "Emails": "john@gmail.com",
-                "Mobile": "1886378566",
-                "Present Salary": "Tk.",
-                "Expected Salary": "Tk.",
-                "Date of Birth": "",
-                "Permanent Address": "",
-                "Company with Duration": "Bandor Steel Industries Ltd(2yrs)",
-                "Job Title with Duration": "Company Legal Adviser(2yrs)",
-                "Institution": "",
-                "Graduation": "",
-                "Total Years of experience": ""
-              }
-            ]
+            Respond with a single JSON object for the candidate. Here's an example of the output:
+            {
+              "Name": "john doe",
+              "Emails": "john@gmail.com",
+              "Mobile": "1886378566",
+              "Present Salary": "Tk.",
+              "Expected Salary": "Tk.",
+              "Date of Birth": "",
+              "Permanent Address": "",
+              "Company with Duration": "Bandor Steel Industries Ltd(2yrs)",
+              "Job Title with Duration": "Company Legal Adviser(2yrs)",
+              "Institution": "",
+              "Graduation": "",
+              "Total Years of experience": ""
+            }
             """
         }
 
-        resume_text = f"""
-        Raw Text:
-        {resume_data['raw_text']}
+        resume_text = resume_data['raw_text']
 
-        Contact Information:
-        {json.dumps(resume_data['contact_info'], indent=2)}
-
-        Sections:
-        {json.dumps(resume_data['sections'], indent=2)}
-        """
+        request_params = {
+            "model": "llama3-8b-8192",
+            # Extraction is deterministic: temperature 0 keeps output stable (and cacheable),
+            # and the one-record schema fits comfortably in 512 tokens
+            "max_tokens": 512,
+            "temperature": 0.0,
+            "response_format": {"type": "json_object"}
+        }
+        cache_keys = self._cache_keys(resume_text, system_prompt["content"], request_params)
+        cached = self._cache_get(cache_keys)
+        if cached is not None:
+            return cached
 
         try:
             response = self.client.create_chat_completion(
-                model="llama3-8b-8192",
                 messages=[
                     system_prompt,
                     {"role": "user", "content": resume_text}
                 ],
-                max_tokens=1024,
-                temperature=0.9
+                **request_params
             )
             
             try:
-                llm_output = json.loads(response.choices[0].message.content)
-                return llm_output
-            except json.JSONDecodeError:
+                llm_output = orjson.loads(response.choices[0].message.content)
+            except orjson.JSONDecodeError:
+                # Not cached, so a malformed reply gets retried on the next run
                 return {"raw_llm_output": response.choices[0].message.content}
+
+            self._cache_put(cache_keys, llm_output)
+            return llm_output
                 
         except GroqAPIError as e:
             return {"error": f"LLM processing failed: {str(e)}"}
 
+    def _cache_keys(self, resume_text: str, system_prompt: str, request_params: Dict[str, Any]) -> List[str]:
+        """Exact and normalized cache keys for an LLM request"""
+        # Model and sampling parameters are part of the key, so changing any of them misses the cache
+        params = orjson.dumps(request_params, option=orjson.OPT_SORT_KEYS).decode()
+        # Case and whitespace differences between otherwise identical resumes map to the same
+        # normalized key; digits are kept so different phone numbers never share an entry
+        normalized_text = _WHITESPACE_RE.sub(' ', resume_text).strip().lower()
+        return [
+            hashlib.blake2b(f"{params}\0{system_prompt}\0{text}".encode(), digest_size=16).hexdigest()
+            for text in (resume_text, normalized_text)
+        ]
+
+    def _cache_get(self, keys: List[str]) -> Optional[Any]:
+        """Return the first cached response matching any of the keys"""
+        with self.cache_lock:
+            for key in keys:
+                row = self.cache.execute('SELECT response FROM llm_cache WHERE key = ?', (key,)).fetchone()
+                if row:
+                    return orjson.loads(row[0])
+        return None
+
+    def _cache_put(self, keys: List[str], response: Any) -> None:
+        """Store a response under all of its cache keys"""
+        serialized = orjson.dumps(response).decode()
+        with self.cache_lock:
+            self.cache.executemany('INSERT OR REPLACE INTO llm_cache (key, response) VALUES (?, ?)',
+                                   [(key, serialized) for key in keys])
+            self.cache.commit()
+
 def main():
     # Configuration
     zip_path = "/content/all.zip"
@@ -1,14 +1,14 @@
 import streamlit as st
 import pandas as pd
 import sqlite3
-from datetime import datetime
+from datetime import datetime, timedelta
 import shutil
 import os
 from typing import Dict, Any, List
 import zipfile
 import json
 from f_script_api_v2 import ResumeProcessor, GroqAPIError
-from sscript import process_resumes
+from sscript import process_resumes, REQUIRED_COLUMNS
 
 def get_groq_api_keys() -> List[str]:
     """Collect all available GROQ API keys from environment variables"""
@@ -30,19 +30,23 @@ def get_groq_api_keys() -> List[str]:
     if multiple_keys:
         api_keys.extend([k.strip() for k in multiple_keys.split(',')])
     
-    return list(set(api_keys))  # Remove duplicates
+    return list(dict.fromkeys(api_keys))  # Remove duplicates, keeping discovery order
 
-def normalize_data(value):
-    """Normalize data types for DataFrame"""
-    if isinstance(value, list):
-        return ', '.join(map(str, value))
-    elif pd.isna(value) or value is None:
-        return ''
-    return str(value)
+def get_conn() -> sqlite3.Connection:
+    """SQLite connection for the current Streamlit session, opened on first use"""
+    # Each rerun runs on a fresh thread, so the connection lives in session_state rather than
+    # thread-local storage; sessions still never share one (or its transactions/total_changes)
+    if 'db_conn' not in st.session_state:
+        conn = sqlite3.connect('resumes.db', check_same_thread=False)
+        # NORMAL sync is safe under WAL and avoids an fsync per commit
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        st.session_state.db_conn = conn
+    return st.session_state.db_conn
 
 def init_db():
     """Initialize SQLite database with resume table"""
-    conn = sqlite3.connect('resumes.db')
+    conn = get_conn()
     c = conn.cursor()
     c.execute('''
         CREATE TABLE IF NOT EXISTS resumes (
@@ -62,43 +66,35 @@ def init_db():
             created_at TEXT
         )
     ''')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_resumes_created_at ON resumes(created_at)')
     conn.commit()
-    conn.close()
 
 def process_and_normalize_df(df: pd.DataFrame) -> pd.DataFrame:
     """Process and normalize DataFrame before database insertion"""
-    # Convert all columns to string type and handle lists
-    for column in df.columns:
-        df[column] = df[column].apply(normalize_data)
+    # List values are already flattened by sscript.normalize_json_data, so a single
+    # vectorized pass is enough to turn everything into strings
+    df = df.fillna('').astype(str)
     
     # Ensure all required columns exist
-    required_columns = [
-        'Name', 'Emails', 'Mobile', 'Present Salary', 'Expected Salary',
-        'Date of Birth', 'Permanent Address', 'Company with Duration',
-        'Job Title with Duration', 'Institution', 'Graduation',
-        'Total Years of experience'
-    ]
-    
-    for col in required_columns:
+    for col in REQUIRED_COLUMNS:
         if col not in df.columns:
             df[col] = ''
     
-    return df[required_columns]
+    return df[list(REQUIRED_COLUMNS)]
 
 def insert_to_db(df: pd.DataFrame) -> tuple[int, int]:
     """Insert DataFrame to SQLite database, preventing duplicates"""
-    conn = sqlite3.connect('resumes.db')
+    conn = get_conn()
     cursor = conn.cursor()
     
     df = process_and_normalize_df(df)
     df.columns = [col.lower().replace(' ', '_') for col in df.columns]
     
-    total_records = len(df)
-    inserted_records = 0
     current_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
     
+    # Rows clashing with the UNIQUE emails/mobile constraints are skipped as duplicates
     insert_sql = '''
-    INSERT INTO resumes (
+    INSERT OR IGNORE INTO resumes (
         name, emails, mobile, present_salary, expected_salary,
         date_of_birth, permanent_address, company_with_duration,
         job_title_with_duration, institution, graduation,
@@ -106,35 +102,37 @@ def insert_to_db(df: pd.DataFrame) -> tuple[int, int]:
     ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
     '''
     
-    for _, row in df.iterrows():
-        try:
-            values = [
-                row['name'], row['emails'], row['mobile'],
-                row['present_salary'], row['expected_salary'],
-                row['date_of_birth'], row['permanent_address'],
-                row['company_with_duration'], row['job_title_with_duration'],
-                row['institution'], row['graduation'],
-                row['total_years_of_experience'], current_time
-            ]
-            cursor.execute(insert_sql, values)
-            inserted_records += 1
-        except sqlite3.IntegrityError:
-            continue
+    columns = [
+        'name', 'emails', 'mobile', 'present_salary', 'expected_salary',
+        'date_of_birth', 'permanent_address', 'company_with_duration',
+        'job_title_with_duration', 'institution', 'graduation',
+        'total_years_of_experience'
+    ]
+    rows = [(*row, current_time) for row in df[columns].itertuples(index=False, name=None)]
+    total_records = len(rows)
+    
+    # One transaction for the whole batch instead of a commit per row; rolled back on error
+    # so the reused connection is never left inside an open transaction
+    changes_before = conn.total_changes
+    with conn:
+        cursor.executemany(insert_sql, rows)
+    inserted_records = conn.total_changes - changes_before
     
-    conn.commit()
-    conn.close()
     return inserted_records, total_records
 
 def search_db(filters: Dict[str, Any]) -> pd.DataFrame:
     """Search database with given filters"""
-    conn = sqlite3.connect('resumes.db')
+    conn = get_conn()
     
     query = "SELECT * FROM resumes WHERE 1=1"
     params = []
     
     if filters.get('created_at'):
-        query += " AND DATE(created_at) = ?"
-        params.append(filters['created_at'])
+        # Half-open range on the raw column so idx_resumes_created_at can be used
+        day = datetime.strptime(filters['created_at'], '%Y-%m-%d')
+        query += " AND created_at >= ? AND created_at < ?"
+        params += [day.strftime('%Y-%m-%d %H:%M:%S'),
+                   (day + timedelta(days=1)).strftime('%Y-%m-%d %H:%M:%S')]
     
     if filters.get('graduation'):
         query += " AND graduation LIKE ?"
@@ -149,7 +147,6 @@ def search_db(filters: Dict[str, Any]) -> pd.DataFrame:
         params.append(f"%{filters['mobile']}%")
     
     df = pd.read_sql_query(query, conn, params=params)
-    conn.close()
     return df
 
 def clean_processed_folder():
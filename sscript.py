@@ -1,10 +1,29 @@
 # sscript.py
 import re
-import json
+import orjson
 import os
 import pandas as pd
 from io import StringIO
 
+_FENCED_JSON = re.compile(r'```(?:json)?\s*(.*?)\s*```', re.DOTALL)
+_BRACKET_JSON = re.compile(r'(\[.*\]|\{.*\})', re.DOTALL)
+
+# Columns of the final resume table, in display order
+REQUIRED_COLUMNS = (
+    'Name',
+    'Emails',
+    'Mobile',
+    'Present Salary',
+    'Expected Salary',
+    'Date of Birth',
+    'Permanent Address',
+    'Company with Duration',
+    'Job Title with Duration',
+    'Institution',
+    'Graduation',
+    'Total Years of experience'
+)
+
 def normalize_json_data(data):
     """Normalize JSON data before converting to DataFrame"""
     if isinstance(data, list):
@@ -30,94 +49,69 @@ def process_resumes(json_folder):
     """
     Process resume JSON files and convert them to a structured DataFrame
     """
-    all_data = []
-    
-    # Define the required columns
-    required_columns = [
-        'Name', 
-        'Emails', 
-        'Mobile', 
-        'Present Salary',
-        'Expected Salary',
-        'Date of Birth',
-        'Permanent Address',
-        'Company with Duration',
-        'Job Title with Duration',
-        'Institution',
-        'Graduation',
-        'Total Years of experience'
-    ]
+    all_records = []
     
     # Iterate through JSON files in the folder
-    for filename in os.listdir(json_folder):
-        if filename.endswith('.json'):
-            file_path = os.path.join(json_folder, filename)
+    for entry in os.scandir(json_folder):
+        filename = entry.name
+        if filename.endswith('.json') and entry.is_file():
+            file_path = entry.path
             
             try:
                 # Read JSON file
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    content = json.load(f)
+                with open(file_path, 'rb') as f:
+                    content = orjson.loads(f.read())
                 
                 # Handle different possible JSON structures
                 if 'raw_llm_output' in content:
                     raw_output = content['raw_llm_output']
                     
-                    # Try extracting JSON from the raw output
-                    json_str = None
-                    
-                    # Try backticks first
-                    extracted = re.search(r'```(?:json)?\s*(.*?)\s*```', raw_output, re.DOTALL)
+                    # process_with_llm only stores raw output after its own JSON parse failed,
+                    # so go straight to extracting the JSON embedded in it
+                    data = None
+                    # Try backticks first, then square brackets or curly braces
+                    extracted = _FENCED_JSON.search(raw_output) or _BRACKET_JSON.search(raw_output)
                     if extracted:
-                        json_str = extracted.group(1)
-                    else:
-                        # Try square brackets or curly braces
-                        extracted = re.search(r'(\[.*\]|\{.*\})', raw_output, re.DOTALL)
-                        if extracted:
-                            json_str = extracted.group(1)
-                    
-                    if json_str:
                         try:
                             # Parse the extracted JSON
-                            data = json.loads(json_str)
-                            # Normalize the data
-                            normalized_data = normalize_json_data(data if isinstance(data, list) else [data])
-                            if normalized_data:
-                                df = pd.DataFrame(normalized_data)
-                                all_data.append(df)
-                        except json.JSONDecodeError:
+                            data = orjson.loads(extracted.group(1))
+                        except orjson.JSONDecodeError:
                             print(f"Error parsing JSON in file {filename}")
+                    
+                    if data is not None:
+                        # Normalize the data
+                        normalized_data = normalize_json_data(data if isinstance(data, list) else [data])
+                        all_records.extend(normalized_data)
                 else:
                     # Direct JSON structure
                     normalized_data = normalize_json_data([content] if not isinstance(content, list) else content)
-                    if normalized_data:
-                        df = pd.DataFrame(normalized_data)
-                        all_data.append(df)
+                    all_records.extend(normalized_data)
                 
             except Exception as e:
                 print(f"Error processing file {filename}: {str(e)}")
                 continue
     
-    # Combine all DataFrames
-    if all_data:
+    # Build a single DataFrame from all records
+    if all_records:
         try:
-            final_df = pd.concat(all_data, ignore_index=True)
+            final_df = pd.DataFrame(all_records)
             
             # Ensure all required columns exist
-            for col in required_columns:
+            for col in REQUIRED_COLUMNS:
                 if col not in final_df.columns:
                     final_df[col] = ''
             
             # Select only the required columns in the specified order
-            final_df = final_df[required_columns]
+            final_df = final_df[list(REQUIRED_COLUMNS)]
             
-            # Final normalization of data types
-            for col in final_df.columns:
-                final_df[col] = final_df[col].astype(str).replace('nan', '').replace('None', '')
+            # Records are already strings, so only cells missing from a record (NaN) and
+            # literal 'nan'/'None' text from the LLM need blanking, in one frame-wide pass
+            final_df = final_df.fillna('').replace({'nan': '', 'None': ''})
             
             return final_df
         
         except Exception as e:
             print(f"Error creating final DataFrame: {str(e)}")
-            return pd.DataFrame(columns=required_columns)
+            return pd.DataFrame(columns=list(REQUIRED_COLUMNS))
     
-    return pd.DataFrame(columns=required_columns)
\ No newline at end of file
+    return pd.DataFrame(columns=list(REQUIRED_COLUMNS))
\ No newline at end of file